@@ -3,13 +3,25 @@ import typing
 import random
 import numpy as np
 from loguru import logger
-from findit import FindIt
 
 from stagesepx import toolbox
 from stagesepx.video import VideoObject, VideoFrame
 
 
 class VideoCutRange(object):
+    # a video usually contains thousands of ranges
+    # without __dict__, each one costs much less memory
+    __slots__ = (
+        "video",
+        "start",
+        "end",
+        "ssim",
+        "mse",
+        "psnr",
+        "start_time",
+        "end_time",
+    )
+
     def __init__(
         self,
         # TODO why can it be a dict?
@@ -67,10 +79,7 @@ class VideoCutRange(object):
         )
 
     def contain(self, frame_id: int) -> bool:
-        # in python:
-        # range(0, 10) => [0, 10)
-        # range(0, 10 + 1) => [0, 10]
-        return frame_id in range(self.start, self.end + 1)
+        return self.start <= frame_id <= self.end
 
     # alias
     contain_frame_id = contain
@@ -144,12 +153,25 @@ class VideoCutRange(object):
 
         return res
 
-    def is_loop(self, threshold: float = None, **_) -> bool:
+    def is_loop(
+        self,
+        threshold: float = None,
+        start_frame: VideoFrame = None,
+        end_frame: VideoFrame = None,
+        **_,
+    ) -> bool:
+        """
+        :param threshold: default to 0.95
+        :param start_frame: frame of self.start, if it has been read already
+        :param end_frame: frame of self.end, if it has been read already
+        """
         if not threshold:
             threshold = 0.95
         operator = self.video.get_operator()
-        start_frame = operator.get_frame_by_id(self.start)
-        end_frame = operator.get_frame_by_id(self.end)
+        if start_frame is None:
+            start_frame = operator.get_frame_by_id(self.start)
+        if end_frame is None:
+            end_frame = operator.get_frame_by_id(self.end)
         return toolbox.compare_ssim(start_frame.data, end_frame.data) > threshold
 
     def diff(self, another: "VideoCutRange", *args, **kwargs) -> typing.List[float]:
@@ -1,5 +1,6 @@
 import os
 import typing
+import itertools
 import cv2
 import uuid
 import json
@@ -11,6 +12,118 @@ from stagesepx.video import VideoObject, VideoFrame
 from stagesepx.cutter.cut_range import VideoCutRange
 
 
+class _RangePack(object):
+    """
+    packed copy of a range list (structure of arrays), for vectorized operations.
+
+    range list can be changed by users anytime, so it is built for each call, and never kept.
+    """
+
+    def __init__(self, range_list: typing.List[VideoCutRange], ordered: bool = None):
+        """
+        :param range_list:
+        :param ordered: sort ranges by start first (stable), it is required by `locate`
+        """
+        count = len(range_list)
+        starts = np.fromiter(
+            (each.start for each in range_list), dtype=np.int64, count=count
+        )
+        if ordered and (np.diff(starts) < 0).any():
+            order = np.argsort(starts, kind="stable")
+            range_list = [range_list[i] for i in order]
+            starts = starts[order]
+
+        self.range_list = range_list
+        self.ordered = ordered
+        self.starts = starts
+        self.ends = np.fromiter(
+            (each.end for each in range_list), dtype=np.int64, count=count
+        )
+        self.end_times = np.fromiter(
+            (each.end_time for each in range_list), dtype=np.float64, count=count
+        )
+        # mean of each range, is_stable is based on them
+        self.ssim_mean = self._mean_of([each.ssim for each in range_list])
+        self.psnr_mean = self._mean_of([each.psnr for each in range_list])
+
+        # ranges from cutter look like: [1-2, 2-3, 3-4 ...] or [1-3, 3-5, 5-7 ...]
+        # when ranges are contiguous and have the same length (step), it is that length
+        # and ranges can be located by arithmetic. else 0
+        length = self.ends - self.starts
+        self.step = 0
+        if (
+            ordered
+            and count
+            and length[0] > 0
+            and (length == length[0]).all()
+            and (self.starts[1:] == self.ends[:-1]).all()
+        ):
+            self.step = int(length[0])
+
+    @staticmethod
+    def _mean_of(value_list: typing.List[typing.List[float]]) -> np.ndarray:
+        """ same as [np.mean(each) for each in value_list] (nan for empty list), but vectorized """
+        counts = np.fromiter(
+            (len(each) for each in value_list), dtype=np.int64, count=len(value_list)
+        )
+        values = np.fromiter(
+            itertools.chain.from_iterable(value_list),
+            dtype=np.float64,
+            count=int(counts.sum()),
+        )
+        sums = np.zeros(len(counts), dtype=np.float64)
+        # reduceat can not handle empty lists, they are skipped (and their sums keep 0)
+        not_empty = counts > 0
+        if not_empty.any():
+            offsets = np.cumsum(counts) - counts
+            sums[not_empty] = np.add.reduceat(values, offsets[not_empty])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return sums / counts
+
+    def get_stable_mask(
+        self, threshold: float = None, psnr_threshold: float = None, **_
+    ) -> np.ndarray:
+        """ see VideoCutResult.get_stable_mask, aligned with self.range_list """
+        if not threshold:
+            threshold = 0.95
+
+        # ssim
+        mask = self.ssim_mean > threshold
+        # psnr (double check if stable)
+        if psnr_threshold:
+            mask &= self.psnr_mean > psnr_threshold
+        return mask
+
+    def locate(self, frame_ids: np.ndarray) -> np.ndarray:
+        """ index of the range which each frame belongs to (the first one), -1 if not found """
+        assert self.ordered, "ranges should be ordered before locating"
+        if not len(self.ends):
+            return np.full(len(frame_ids), -1, dtype=np.int64)
+
+        if self.step:
+            # O(1): the first range which ends after frame id
+            index = -((self.starts[0] - frame_ids) // self.step) - 1
+            np.maximum(index, 0, out=index)
+        else:
+            # binary search on the end of ranges
+            index = np.searchsorted(self.ends, frame_ids, side="left")
+        found = index < len(self.ends)
+        index[~found] = 0
+        found &= (self.starts[index] <= frame_ids) & (frame_ids <= self.ends[index])
+        index[~found] = -1
+        return index
+
+    def get_end_time_dict(
+        self, frame_id_list: typing.List[int]
+    ) -> typing.Dict[int, float]:
+        """ end time of the range which each frame belongs to, all the frames are searched at once """
+        frame_ids = np.asarray(frame_id_list, dtype=np.int64)
+        index = self.locate(frame_ids)
+        if (index < 0).any():
+            raise RuntimeError(f"frame {frame_ids[index < 0][0]} not found in video")
+        return dict(zip(frame_ids.tolist(), self.end_times[index].tolist()))
+
+
 class VideoCutResult(object):
     def __init__(
         self,
@@ -26,11 +139,37 @@ class VideoCutResult(object):
 
     def get_target_range_by_id(self, frame_id: int) -> VideoCutRange:
         """ get target VideoCutRange by id (which belongs to) """
-        for each in self.range_list:
+        # range_list is usually ordered by frame id, binary search on the end of ranges
+        # the first range which ends after frame_id is the target
+        range_list = self.range_list
+        low, high = 0, len(range_list)
+        while low < high:
+            mid = (low + high) // 2
+            if range_list[mid].end < frame_id:
+                low = mid + 1
+            else:
+                high = mid
+        if low < len(range_list) and range_list[low].contain(frame_id):
+            return range_list[low]
+
+        # range_list has been changed (not ordered), or frame not existed
+        for each in range_list:
             if each.contain(frame_id):
                 return each
         raise RuntimeError(f"frame {frame_id} not found in video")
 
+    def get_stable_mask(
+        self, threshold: float = None, psnr_threshold: float = None, **_
+    ) -> np.ndarray:
+        """
+        same as [i.is_stable(**kwargs) for i in self.range_list], but vectorized
+
+        :param threshold: see VideoCutRange.is_stable
+        :param psnr_threshold: see VideoCutRange.is_stable
+        :return: bool array, aligned with range_list
+        """
+        return _RangePack(self.range_list).get_stable_mask(threshold, psnr_threshold)
+
     @staticmethod
     def _length_filter(
         range_list: typing.List[VideoCutRange], limit: int
@@ -41,37 +180,60 @@ class VideoCutResult(object):
                 after.append(each)
         return after
 
+    @staticmethod
+    def _merge_range_group(group: typing.List[VideoCutRange]) -> VideoCutRange:
+        """ same as merging them one by one, but lists only built once """
+        if len(group) == 1:
+            return group[0]
+        first, last = group[0], group[-1]
+        return VideoCutRange(
+            first.video,
+            first.start,
+            last.end,
+            list(itertools.chain.from_iterable(each.ssim for each in group)),
+            list(itertools.chain.from_iterable(each.mse for each in group)),
+            list(itertools.chain.from_iterable(each.psnr for each in group)),
+            first.start_time,
+            last.end_time,
+        )
+
     def get_unstable_range(
         self, limit: int = None, range_threshold: float = None, **kwargs
     ) -> typing.List[VideoCutRange]:
         """ return unstable range only """
-        change_range_list = sorted(
-            [i for i in self.range_list if not i.is_stable(**kwargs)],
-            key=lambda x: x.start,
+        return self._get_unstable_range(
+            _RangePack(self.range_list, ordered=True), limit, range_threshold, **kwargs
         )
 
+    def _get_unstable_range(
+        self,
+        pack: _RangePack,
+        limit: int = None,
+        range_threshold: float = None,
+        **kwargs,
+    ) -> typing.List[VideoCutRange]:
+        # ranges in pack are ordered by start
+        stable_mask = pack.get_stable_mask(**kwargs)
+        change_range_list = [
+            i for i, stable in zip(pack.range_list, stable_mask) if not stable
+        ]
+
         # video can be totally stable ( nothing changed )
         # or only one unstable range
         if len(change_range_list) <= 1:
             return change_range_list
 
-        # merge
-        i = 0
+        # merge, in a single pass
+        # a merged range ends with its last part, so checking the last part is enough
         merged_change_range_list = list()
-        while i < len(change_range_list) - 1:
-            cur = change_range_list[i]
-            while cur.can_merge(change_range_list[i + 1], **kwargs):
-                # can be merged
-                i += 1
-                cur = cur.merge(change_range_list[i], **kwargs)
-
-                # out of range
-                if i + 1 >= len(change_range_list):
-                    break
-            merged_change_range_list.append(cur)
-            i += 1
-        if change_range_list[-1].start > merged_change_range_list[-1].end:
-            merged_change_range_list.append(change_range_list[-1])
+        group = [change_range_list[0]]
+        for each in change_range_list[1:]:
+            if group[-1].can_merge(each, **kwargs):
+                group.append(each)
+            else:
+                merged_change_range_list.append(self._merge_range_group(group))
+                group = [each]
+        merged_change_range_list.append(self._merge_range_group(group))
 
         if limit:
             merged_change_range_list = self._length_filter(
@@ -79,9 +241,20 @@ class VideoCutResult(object):
             )
         # merged range check
         if range_threshold:
-            merged_change_range_list = [
-                i for i in merged_change_range_list if not i.is_loop(range_threshold)
+            # merged ranges are ordered and not overlapped
+            # so all the frames needed can be read in one pass
+            frame_id_list = [
+                i for each in merged_change_range_list for i in (each.start, each.end)
             ]
+            frames = self.video.get_operator().get_frames_by_ids(frame_id_list)
+            not_loop_list = list()
+            for each in merged_change_range_list:
+                start_frame, end_frame = next(frames), next(frames)
+                if not each.is_loop(
+                    range_threshold, start_frame=start_frame, end_frame=end_frame
+                ):
+                    not_loop_list.append(each)
+            merged_change_range_list = not_loop_list
         logger.debug(
             f"unstable range of [{self.video.path}]: {merged_change_range_list}"
         )
@@ -122,7 +295,9 @@ class VideoCutResult(object):
             - start > 0, end = frame_count
             - start = 0, end = frame_count
         """
-        unstable_range_list = self.get_unstable_range(unstable_limit, **kwargs)
+        # packed once, and shared in this call
+        pack = _RangePack(self.range_list, ordered=True)
+        unstable_range_list = self._get_unstable_range(pack, unstable_limit, **kwargs)
 
         # it is not a real frame (not existed)
         # just take it as a beginning
@@ -162,10 +337,27 @@ class VideoCutResult(object):
         # start of last stable range == end of last unstable range
         end_stable_range_start_id = unstable_range_list[-1].end + 1
 
+        # frames whose timestamps are needed, looked up together
+        stable_start = first_stable_range_end_id >= 1
+        stable_end = end_stable_range_start_id <= video_end_frame_id
+        boundary_list = [
+            each
+            for i in range(len(unstable_range_list) - 1)
+            for each in (
+                unstable_range_list[i].end + 1,
+                unstable_range_list[i + 1].start - 1,
+            )
+        ]
+        if stable_start:
+            boundary_list.append(first_stable_range_end_id)
+        if stable_end:
+            boundary_list.append(end_stable_range_start_id)
+        end_time_of = pack.get_end_time_dict(boundary_list)
+
         # IMPORTANT: len(ssim_list) + 1 == video_end_frame_id
         range_list: typing.List[VideoCutRange] = list()
         # stable start
-        if first_stable_range_end_id >= 1:
+        if stable_start:
             logger.debug(f"stable start")
             range_list.append(
                 VideoCutRange(
@@ -176,32 +368,13 @@ class VideoCutResult(object):
                     [0.0],
                     [0.0],
                     video_start_timestamp,
-                    self.get_target_range_by_id(first_stable_range_end_id).end_time,
+                    end_time_of[first_stable_range_end_id],
                 )
             )
         # unstable start
         else:
             logger.debug("unstable start")
 
-        # stable end
-        if end_stable_range_start_id <= video_end_frame_id:
-            logger.debug("stable end")
-            range_list.append(
-                VideoCutRange(
-                    self.video,
-                    end_stable_range_start_id,
-                    video_end_frame_id,
-                    [1.0],
-                    [0.0],
-                    [0.0],
-                    self.get_target_range_by_id(end_stable_range_start_id).end_time,
-                    video_end_timestamp,
-                )
-            )
-        # unstable end
-        else:
-            logger.debug("unstable end")
-
         # diff range
         for i in range(len(unstable_range_list) - 1):
             range_start_id = unstable_range_list[i].end + 1
@@ -222,17 +395,36 @@ class VideoCutResult(object):
                     [1.0],
                     [0.0],
                     [0.0],
-                    self.get_target_range_by_id(range_start_id).end_time,
-                    self.get_target_range_by_id(range_end_id).end_time,
+                    end_time_of[range_start_id],
+                    end_time_of[range_end_id],
                 )
             )
 
+        # stable end
+        if stable_end:
+            logger.debug("stable end")
+            range_list.append(
+                VideoCutRange(
+                    self.video,
+                    end_stable_range_start_id,
+                    video_end_frame_id,
+                    [1.0],
+                    [0.0],
+                    [0.0],
+                    end_time_of[end_stable_range_start_id],
+                    video_end_timestamp,
+                )
+            )
+        # unstable end
+        else:
+            logger.debug("unstable end")
+
         # remove some ranges, which is limit
         if limit:
             range_list = self._length_filter(range_list, limit)
+        # ranges were appended in order (start, diff ranges, end), no need to sort
         logger.debug(f"stable range of [{self.video.path}]: {range_list}")
-        stable_range_list = sorted(range_list, key=lambda x: x.start)
-        return stable_range_list, unstable_range_list
+        return range_list, unstable_range_list
 
     def get_stable_range(
         self, limit: int = None, **kwargs
@@ -381,6 +573,9 @@ class VideoCutResult(object):
             if isinstance(obj, np.ndarray):
                 # ignore
                 return "<np.ndarray object>"
+            # such as VideoCutRange
+            if not hasattr(obj, "__dict__"):
+                return {k: getattr(obj, k) for k in obj.__slots__}
             return obj.__dict__
 
         return json.dumps(self, sort_keys=True, default=_handler)
@@ -1,4 +1,7 @@
+import os
 import typing
+import collections
+from concurrent.futures import ThreadPoolExecutor, Future
 import numpy as np
 from loguru import logger
 
@@ -54,11 +57,51 @@ class VideoCutter(object):
     @staticmethod
     def pic_split(origin: np.ndarray, block: int) -> typing.List[np.ndarray]:
         """ actually, when block == 3, blocks' count would be 3 * 3 = 9 """
-        result: typing.List[np.ndarray] = list()
-        for each_block in np.array_split(origin, block, axis=0):
-            sub_block = np.array_split(each_block, block, axis=1)
-            result += sub_block
-        return result
+        # each block is a view of origin, sliced directly (without splitting rows first)
+        # slices are built once for each shape and block
+        slice_list = toolbox.get_block_slices(*origin.shape[:2], block)
+        return [origin[each] for each in slice_list]
+
+    @staticmethod
+    def compare_block(
+        start: np.ndarray, end: np.ndarray, block: int
+    ) -> typing.Tuple[float, float, float]:
+        """
+        compare two frames block by block (blocks are the same as pic_split)
+
+        ssim map is calculated only once on the whole frame, and then reduced to each block.
+
+        :return: min ssim, max mse and max psnr of all the blocks
+        """
+        # same as calc_ssim_map, mse and psnr are also calculated on grey frames
+        start, end = toolbox.turn_grey(start), toolbox.turn_grey(end)
+
+        # identical frames are common in stable stages (such as static screen)
+        # comparing them is much cheaper than computing ssim
+        if np.array_equal(start, end):
+            return 1.0, 0.0, 1.0
+
+        ssim_sum, block_size = toolbox.block_sum(
+            toolbox.calc_ssim_map(start, end), block
+        )
+        part_ssim = ssim_sum / block_size
+
+        # reduced together, as a stack
+        # float32 is enough for uint8 frames, and halves the memory traffic
+        start = start.astype(np.float32, copy=False)
+        (diff_sum, start_sum), _ = toolbox.block_sum(
+            np.square([start - end, start]), block
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # mse is very sensitive
+            part_mse = np.sqrt(diff_sum / start_sum)
+            part_psnr = 10 * np.log10(255 ** 2 / (diff_sum / block_size))
+        # when err == 0, psnr will be 'inf'
+        part_psnr[np.isinf(part_psnr)] = 100.0
+        part_psnr /= 100
+        logger.debug(f"parts: ssim={part_ssim}; mse={part_mse}; psnr={part_psnr}")
+
+        return float(part_ssim.min()), float(part_mse.max()), float(part_psnr.max())
 
     def _apply_hook(self, frame: VideoFrame, *args, **kwargs) -> VideoFrame:
         for each_hook in self._hook_list:
@@ -72,10 +115,12 @@ class VideoCutter(object):
         range_list: typing.List[VideoCutRange] = list()
         logger.info(f"total frame count: {video.frame_count}, size: {video.frame_size}")
 
-        # load the first two frames
-        video_operator = video.get_operator()
-        cur_frame = video_operator.get_frame_by_id(1)
-        next_frame = video_operator.get_frame_by_id(1 + self.step)
+        # frames are decoded sequentially, instead of seeking for each one
+        # hooks will overwrite the frame, so frames in memory should be copied first
+        frame_iterator = (each.copy() for each in video.get_iterator(self.step))
+
+        # load the first frame
+        cur_frame = next(frame_iterator)
 
         # hook
         cur_frame = self._apply_hook(cur_frame)
@@ -84,60 +129,54 @@ class VideoCutter(object):
         if not block:
             block = 3
 
-        while True:
-            # hook
-            next_frame = self._apply_hook(next_frame, *args, **kwargs)
-
-            logger.debug(
-                f"computing {cur_frame.frame_id}({cur_frame.timestamp}) & {next_frame.frame_id}({next_frame.timestamp}) ..."
-            )
-            start_part_list = self.pic_split(cur_frame.data, block)
-            end_part_list = self.pic_split(next_frame.data, block)
-
-            # find the min ssim and the max mse / psnr
-            ssim = 1.0
-            mse = 0.0
-            psnr = 0.0
-            for part_index, (each_start, each_end) in enumerate(
-                zip(start_part_list, end_part_list)
-            ):
-                part_ssim = toolbox.compare_ssim(each_start, each_end)
-                if part_ssim < ssim:
-                    ssim = part_ssim
-
-                # mse is very sensitive
-                part_mse = toolbox.calc_mse(each_start, each_end)
-                if part_mse > mse:
-                    mse = part_mse
-
-                part_psnr = toolbox.calc_psnr(each_start, each_end)
-                if part_psnr > psnr:
-                    psnr = part_psnr
-                logger.debug(
-                    f"part {part_index}: ssim={part_ssim}; mse={part_mse}; psnr={part_psnr}"
-                )
+        # decoding and hooks run in current thread (hooks may care about the order)
+        # comparisons run in a thread pool, opencv releases the GIL during filtering
+        # at most `max_pending` pairs are waiting, to keep the memory cost bounded
+        max_pending = 32
+        pending: typing.Deque[
+            typing.Tuple[VideoFrame, VideoFrame, Future]
+        ] = collections.deque()
+
+        def _collect():
+            start_frame, end_frame, future = pending.popleft()
+            ssim, mse, psnr = future.result()
             logger.debug(
-                f"between {cur_frame.frame_id} & {next_frame.frame_id}: ssim={ssim}; mse={mse}; psnr={psnr}"
+                f"between {start_frame.frame_id} & {end_frame.frame_id}: ssim={ssim}; mse={mse}; psnr={psnr}"
             )
 
             range_list.append(
                 VideoCutRange(
                     video,
-                    start=cur_frame.frame_id,
-                    end=next_frame.frame_id,
+                    start=start_frame.frame_id,
+                    end=end_frame.frame_id,
                     ssim=[ssim],
                     mse=[mse],
                     psnr=[psnr],
-                    start_time=cur_frame.timestamp,
-                    end_time=next_frame.timestamp,
+                    start_time=start_frame.timestamp,
+                    end_time=end_frame.timestamp,
                 )
             )
 
-            # load the next one
-            cur_frame = next_frame
-            next_frame = video_operator.get_frame_by_id(next_frame.frame_id + self.step)
-            if next_frame is None:
-                break
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            for next_frame in frame_iterator:
+                # hook
+                next_frame = self._apply_hook(next_frame, *args, **kwargs)
+
+                logger.debug(
+                    f"computing {cur_frame.frame_id}({cur_frame.timestamp}) & {next_frame.frame_id}({next_frame.timestamp}) ..."
+                )
+                future = executor.submit(
+                    self.compare_block, cur_frame.data, next_frame.data, block
+                )
+                pending.append((cur_frame, next_frame, future))
+                if len(pending) >= max_pending:
+                    _collect()
+
+                # load the next one
+                cur_frame = next_frame
+
+            while pending:
+                _collect()
 
         return range_list
 
@@ -80,11 +80,14 @@ class CompressHook(BaseHook):
         logger.debug(f"compress rate: {compress_rate}")
         logger.debug(f"target size: {target_size}")
 
+        # resolved once, rather than for each frame
+        self._compress = toolbox.get_compress_func(
+            compress_rate=compress_rate, target_size=target_size
+        )
+
     def do(self, frame: VideoFrame, *_, **__) -> typing.Optional[VideoFrame]:
         super().do(frame, *_, **__)
-        frame.data = toolbox.compress_frame(
-            frame.data, compress_rate=self.compress_rate, target_size=self.target_size
-        )
+        frame.data = self._compress(frame.data)
         return frame
 
 
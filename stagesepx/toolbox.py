@@ -1,5 +1,6 @@
 import cv2
 import contextlib
+import functools
 import time
 import random
 import typing
@@ -9,7 +10,6 @@ import numpy as np
 import subprocess
 from base64 import b64encode
 from skimage.filters import threshold_otsu
-from skimage.metrics import structural_similarity as origin_compare_ssim
 from skimage.metrics import normalized_root_mse as compare_nrmse
 from skimage.metrics import peak_signal_noise_ratio as compare_psnr
 from skimage.feature import hog, local_binary_pattern
@@ -43,9 +43,165 @@ def video_jump(video_cap: cv2.VideoCapture, frame_id: int):
     )
 
 
+def video_read(
+    video_cap: cv2.VideoCapture,
+    step: int = None,
+    seek_threshold: int = None,
+    buffer: np.ndarray = None,
+) -> typing.Tuple[bool, np.ndarray]:
+    """
+    read the frame which is `step` frames after the current one
+
+    seeking makes the decoder go back to the previous key frame and decode again.
+    so frames are grabbed and dropped one by one, unless step is larger than seek_threshold.
+
+    :param video_cap:
+    :param step: default to 1, the next frame
+    :param seek_threshold: default to 30, about the length of a common GOP
+    :param buffer: frame will be decoded into it (if size matched), instead of a new array
+    :return: same as video_cap.read()
+    """
+    if not step:
+        step = 1
+    if not seek_threshold:
+        seek_threshold = 30
+
+    if step > seek_threshold:
+        video_jump(video_cap, get_current_frame_id(video_cap) + step)
+    else:
+        for _ in range(step - 1):
+            if not video_cap.grab():
+                return False, None
+    if buffer is not None:
+        return video_cap.read(buffer)
+    return video_cap.read()
+
+
+@functools.lru_cache(maxsize=None)
+def _get_gaussian_kernel(size: int, sigma: float) -> np.ndarray:
+    return cv2.getGaussianKernel(size, sigma, ktype=cv2.CV_32F)
+
+
+def calc_ssim_map(
+    pic1: np.ndarray,
+    pic2: np.ndarray,
+    data_range: float = None,
+    gaussian_weights: bool = None,
+) -> np.ndarray:
+    """
+    per-pixel ssim map, same as skimage.metrics.structural_similarity(full=True)
+
+    both of pictures will be converted into grey, and all the calculation happens in float32.
+    by default, local statistics come from a 7x7 uniform window (cv2.boxFilter),
+    whose cost does not depend on the window size.
+
+    :param pic1:
+    :param pic2:
+    :param data_range: default to 255 (uint8 frames)
+    :param gaussian_weights: use gaussian window (size 11, sigma 1.5) instead, with separable filters
+    :return: ssim map, which has the same shape as pic1
+    """
+    pic1, pic2 = [turn_grey(i).astype(np.float32, copy=False) for i in [pic1, pic2]]
+    assert pic1.shape == pic2.shape, f"shape not equal: {pic1.shape} & {pic2.shape}"
+    if not data_range:
+        data_range = 255
+
+    # border: same as scipy.ndimage (mode="reflect"), which is used by skimage
+    if gaussian_weights:
+        kernel = _get_gaussian_kernel(11, 1.5)
+        cov_norm = 1.0
+
+        def _filter(pic: np.ndarray) -> np.ndarray:
+            return cv2.sepFilter2D(
+                pic, cv2.CV_32F, kernel, kernel, borderType=cv2.BORDER_REFLECT
+            )
+
+    else:
+        win_size = 7
+        # sample covariance
+        cov_norm = win_size ** 2 / (win_size ** 2 - 1)
+
+        def _filter(pic: np.ndarray) -> np.ndarray:
+            return cv2.boxFilter(
+                pic, cv2.CV_32F, (win_size, win_size), borderType=cv2.BORDER_REFLECT
+            )
+
+    c1 = (0.01 * data_range) ** 2
+    c2 = (0.03 * data_range) ** 2
+
+    mu1 = _filter(pic1)
+    mu2 = _filter(pic2)
+    mu1_sq = mu1 * mu1
+    mu2_sq = mu2 * mu2
+    mu1_mu2 = mu1 * mu2
+    sigma1_sq = cov_norm * (_filter(pic1 * pic1) - mu1_sq)
+    sigma2_sq = cov_norm * (_filter(pic2 * pic2) - mu2_sq)
+    sigma12 = cov_norm * (_filter(pic1 * pic2) - mu1_mu2)
+
+    return ((2 * mu1_mu2 + c1) * (2 * sigma12 + c2)) / (
+        (mu1_sq + mu2_sq + c1) * (sigma1_sq + sigma2_sq + c2)
+    )
+
+
 def compare_ssim(pic1: np.ndarray, pic2: np.ndarray) -> float:
-    pic1, pic2 = [turn_grey(i) for i in [pic1, pic2]]
-    return origin_compare_ssim(pic1, pic2)
+    ssim_map = calc_ssim_map(pic1, pic2)
+    # same as skimage: ignore the border (half of window), it is affected by padding
+    pad = 3
+    if min(ssim_map.shape[:2]) > 2 * pad:
+        ssim_map = ssim_map[pad:-pad, pad:-pad]
+    return float(ssim_map.mean(dtype=np.float64))
+
+
+@functools.lru_cache(maxsize=None)
+def get_block_layout(
+    h: int, w: int, block: int
+) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    layout of blocks, same as np.array_split (block * block, rows first)
+
+    :return: (edges of rows, edges of columns, size of each block).
+        edges contain block + 1 items, block i of rows is [edges[i], edges[i + 1])
+    """
+    h_size = np.array([h // block + (i < h % block) for i in range(block)])
+    w_size = np.array([w // block + (i < w % block) for i in range(block)])
+    h_edge = np.concatenate(([0], np.cumsum(h_size)))
+    w_edge = np.concatenate(([0], np.cumsum(w_size)))
+    size = np.outer(h_size, w_size)
+    # shared by all the callers
+    for each in (h_edge, w_edge, size):
+        each.setflags(write=False)
+    return h_edge, w_edge, size
+
+
+@functools.lru_cache(maxsize=None)
+def get_block_slices(
+    h: int, w: int, block: int
+) -> typing.Tuple[typing.Tuple[slice, slice], ...]:
+    """ (row slice, column slice) of each block, rows first. see get_block_layout """
+    h_edge, w_edge, _ = [each.tolist() for each in get_block_layout(h, w, block)]
+    return tuple(
+        (slice(h_edge[i], h_edge[i + 1]), slice(w_edge[j], w_edge[j + 1]))
+        for i in range(block)
+        for j in range(block)
+    )
+
+
+def block_sum(origin: np.ndarray, block: int) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """
+    sum of each block, without splitting origin into pieces
+
+    blocks are the same as np.array_split (block * block, rows first).
+    layout of blocks is cached by shape, so it will not be computed again for each frame.
+
+    :param origin: 2D array, or a stack of 2D arrays (blocks are split on the last two axes)
+    :param block: when block == 3, blocks' count would be 3 * 3 = 9
+    :return: (sum of each block, size of each block), size is a (block, block) array
+    """
+    h_edge, w_edge, size = get_block_layout(*origin.shape[-2:], block)
+    # origin can be float32, but sums are accumulated in float64 for precision
+    result = np.add.reduceat(origin, h_edge[:-1], axis=-2, dtype=np.float64)
+    result = np.add.reduceat(result, w_edge[:-1], axis=-1)
+    return result, size
 
 
 def multi_compare_ssim(
@@ -115,6 +271,9 @@ def get_frame(
 
 
 def turn_grey(old: np.ndarray) -> np.ndarray:
+    # frames are usually grey already (since decoding), skip the failed conversion
+    if old.ndim == 2:
+        return old
     try:
         return cv2.cvtColor(old, cv2.COLOR_RGB2GRAY)
     except cv2.error:
@@ -229,21 +388,50 @@ def compress_frame(
     :param interpolation:
     :return:
     """
+    return get_compress_func(compress_rate, target_size, not_grey, interpolation)(old)
+
 
-    target = turn_grey(old) if not not_grey else old
+def get_compress_func(
+    compress_rate: float = None,
+    target_size: typing.Tuple[int, int] = None,
+    not_grey: bool = None,
+    interpolation: int = None,
+) -> typing.Callable[[np.ndarray], np.ndarray]:
+    """
+    same as compress_frame, but arguments are resolved only once.
+    useful when compressing lots of frames with the same arguments.
 
+    :return: function, which accepts a frame and returns the compressed one
+    """
     if not interpolation:
         interpolation = cv2.INTER_AREA
+
+    def _grey(old: np.ndarray) -> np.ndarray:
+        return turn_grey(old) if not not_grey else old
+
     # target size first
     if target_size:
-        return cv2.resize(target, target_size, interpolation=interpolation)
+
+        def _compress(old: np.ndarray) -> np.ndarray:
+            return cv2.resize(_grey(old), target_size, interpolation=interpolation)
+
     # else, use compress rate
     # default rate is 1 (no compression)
-    if not compress_rate:
-        return target
-    return cv2.resize(
-        target, (0, 0), fx=compress_rate, fy=compress_rate, interpolation=interpolation
-    )
+    elif not compress_rate:
+        _compress = _grey
+
+    else:
+
+        def _compress(old: np.ndarray) -> np.ndarray:
+            return cv2.resize(
+                _grey(old),
+                (0, 0),
+                fx=compress_rate,
+                fy=compress_rate,
+                interpolation=interpolation,
+            )
+
+    return _compress
 
 
 def get_timestamp_str() -> str:
@@ -279,17 +467,91 @@ def match_template_with_object(
     template: np.ndarray,
     target: np.ndarray,
     engine_template_cv_method_name: str = None,
+    engine_template_scale: typing.Sequence = None,
     **kwargs,
 ) -> typing.Dict[str, typing.Any]:
+    """
+    multi-scale template matching, result is the same as findit's template engine
+
+    cv2.matchTemplate is called directly. findit will be used instead, when
+    any other findit option (pro_mode, engine_template_compress_rate ...) is set.
+
+    :param template:
+    :param target:
+    :param engine_template_cv_method_name: default to "cv2.TM_CCOEFF_NORMED"
+    :param engine_template_scale: args of np.linspace, default to (1, 3, 10)
+    :param kwargs: other findit options
+    :return: {"target_point": central point, "target_sim": similarity, "ok": True, "raw": ...}
+    """
     # change the default method
     if not engine_template_cv_method_name:
         engine_template_cv_method_name = "cv2.TM_CCOEFF_NORMED"
+    if not engine_template_scale:
+        engine_template_scale = (1, 3, 10)
+
+    # options which are not handled here
+    if kwargs:
+        return _match_template_with_findit(
+            template,
+            target,
+            engine_template_cv_method_name=engine_template_cv_method_name,
+            engine_template_scale=engine_template_scale,
+            **kwargs,
+        )
+
+    cv_method = getattr(cv2, engine_template_cv_method_name.split(".")[-1])
+    # same as findit: uint8, and BGR => grey
+    template, target = [i.astype(np.uint8) for i in [template, target]]
+    template, target = [
+        cv2.cvtColor(i, cv2.COLOR_BGR2GRAY) if i.ndim == 3 else i
+        for i in [template, target]
+    ]
+    h, w = template.shape[:2]
+
+    best = None
+    for each_scale in np.linspace(*engine_template_scale):
+        # keep aspect ratio
+        new_w = int(w * each_scale)
+        new_h = int(h * new_w / float(w))
+        resized = cv2.resize(template, (new_w, new_h), interpolation=cv2.INTER_AREA)
+        # template can not be larger than target
+        if resized.shape[0] > target.shape[0] or resized.shape[1] > target.shape[1]:
+            break
+        res = cv2.matchTemplate(target, resized, cv_method)
+        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
+        if (not best) or max_val >= best[1]:
+            best = (min_val, max_val, min_loc, max_loc, resized.shape[:2])
+
+    # same as findit
+    if not best:
+        raise IndexError(
+            f"template {template.shape} is larger than target {target.shape}"
+        )
+    min_val, max_val, min_loc, max_loc, (size_y, size_x) = best
+
+    # left-top => central
+    min_loc, max_loc = [
+        [int(x + size_x / 2), int(y + size_y / 2)] for x, y in (min_loc, max_loc)
+    ]
+    result = {
+        "target_point": max_loc,
+        "target_sim": max_val,
+        "ok": True,
+        "raw": {
+            "min_val": min_val,
+            "max_val": max_val,
+            "min_loc": min_loc,
+            "max_loc": max_loc,
+        },
+    }
+    logger.debug(f"template matching result: {result}")
+    return result
 
-    fi = FindIt(
-        engine=["template"],
-        engine_template_cv_method_name=engine_template_cv_method_name,
-        **kwargs,
-    )
+
+def _match_template_with_findit(
+    template: np.ndarray, target: np.ndarray, **kwargs
+) -> typing.Dict[str, typing.Any]:
+    fi = FindIt(engine=["template"], **kwargs)
     # load template
     fi_template_name = "default"
     fi.load_template(fi_template_name, pic_object=template)
@@ -19,12 +19,27 @@ class VideoFrame(object):
         return f"<VideoFrame id={self.frame_id} timestamp={self.timestamp}>"
 
     @classmethod
-    def init(cls, cap: cv2.VideoCapture, frame: np.ndarray) -> "VideoFrame":
-        frame_id = toolbox.get_current_frame_id(cap)
+    def init(
+        cls,
+        cap: cv2.VideoCapture,
+        frame: np.ndarray,
+        frame_id: int = None,
+        keep_color: bool = None,
+    ) -> "VideoFrame":
+        """
+        :param cap:
+        :param frame: frame which is just read from cap
+        :param frame_id: if known (eg: counted while reading sequentially), cap will not be asked for it
+        :param keep_color: by default, frame will be turned grey (only once, here)
+        """
+        if frame_id is None:
+            frame_id = toolbox.get_current_frame_id(cap)
+        # timestamp always comes from cap, because fps can be variable
         timestamp = toolbox.get_current_frame_time(cap)
-        grey = toolbox.turn_grey(frame)
+        if not keep_color:
+            frame = toolbox.turn_grey(frame)
         logger.debug(f"new a frame: {frame_id}({timestamp})")
-        return VideoFrame(frame_id, timestamp, grey)
+        return VideoFrame(frame_id, timestamp, frame)
 
     def copy(self):
         return VideoFrame(self.frame_id, self.timestamp, self.data[:])
@@ -52,6 +67,13 @@ class _BaseFrameOperator(object):
     def get_frame_by_id(self, frame_id: int) -> typing.Optional[VideoFrame]:
         raise NotImplementedError
 
+    def get_frames_by_ids(
+        self, frame_id_list: typing.List[int]
+    ) -> typing.Generator[typing.Optional[VideoFrame], None, None]:
+        """ get frames one by one, in the same order as frame_id_list """
+        for each_id in frame_id_list:
+            yield self.get_frame_by_id(each_id)
+
     def get_length(self) -> int:
         return self.video.frame_count
 
@@ -72,9 +94,44 @@ class FileFrameOperator(_BaseFrameOperator):
         with toolbox.video_capture(self.video.path) as cap:
             toolbox.video_jump(cap, frame_id)
             success, frame = cap.read()
-            video_frame = VideoFrame.init(cap, frame) if success else None
+            video_frame = (
+                VideoFrame.init(cap, frame, keep_color=self.video.keep_color)
+                if success
+                else None
+            )
         return video_frame
 
+    def get_frames_by_ids(
+        self, frame_id_list: typing.List[int]
+    ) -> typing.Generator[typing.Optional[VideoFrame], None, None]:
+        """
+        get frames one by one, in the same order as frame_id_list
+
+        all the frames are read with one capture. when ids are ascending,
+        it reads forward (see toolbox.video_read) instead of seeking for each frame.
+        """
+        with toolbox.video_capture(self.video.path) as cap:
+            # id of the last read frame
+            cur_id = 0
+            video_frame = None
+            for each_id in frame_id_list:
+                if each_id > self.get_length():
+                    yield None
+                    continue
+                if each_id != cur_id:
+                    if each_id > cur_id:
+                        success, frame = toolbox.video_read(cap, each_id - cur_id)
+                    else:
+                        toolbox.video_jump(cap, each_id)
+                        success, frame = cap.read()
+                    video_frame = (
+                        VideoFrame.init(cap, frame, each_id, self.video.keep_color)
+                        if success
+                        else None
+                    )
+                    cur_id = each_id
+                yield video_frame
+
 
 class VideoObject(object):
     def __init__(
@@ -82,13 +139,22 @@ class VideoObject(object):
         path: typing.Union[bytes, str, os.PathLike],
         pre_load: bool = None,
         fps: int = None,
+        keep_color: bool = None,
         *_,
         **__,
     ):
+        """
+        :param path: video file path
+        :param pre_load: load all the frames into memory
+        :param fps: convert video to this fps first (ffmpeg needed)
+        :param keep_color: frames are grey by default. keep their colors if you need them
+        """
         assert os.path.isfile(path), f"video [{path}] not existed"
         self.path: str = str(path)
         self.data: typing.Optional[typing.Tuple[VideoFrame]] = tuple()
 
+        self.keep_color: bool = keep_color
+
         self.fps: int = fps
         if fps:
             video_path = os.path.join(tempfile.mkdtemp(), f"tmp_{fps}.mp4")
@@ -118,10 +184,14 @@ class VideoObject(object):
         data: typing.List[VideoFrame] = []
         with toolbox.video_capture(self.path) as cap:
             success, frame = cap.read()
+            frame_id = 1
             while success:
-                frame_object = VideoFrame.init(cap, frame)
+                frame_object = VideoFrame.init(cap, frame, frame_id, self.keep_color)
                 data.append(frame_object)
-                success, frame = cap.read()
+                success, frame = toolbox.video_read(
+                    cap, buffer=self._get_reusable_buffer(frame_object, frame)
+                )
+                frame_id += 1
 
         # calculate memory cost
         each_cost = data[0].data.nbytes
@@ -137,25 +207,49 @@ class VideoObject(object):
         # fix the length ( the last frame may be broken sometimes )
         self.frame_count = len(data)
 
-    def _read_from_file(self) -> typing.Generator[VideoFrame, None, None]:
+    @staticmethod
+    def _get_reusable_buffer(
+        frame_object: VideoFrame, decoded: np.ndarray
+    ) -> typing.Optional[np.ndarray]:
+        # decoded frame has been copied into a grey one, its buffer can be used by the next frame
+        # (unless it was grey already)
+        if np.shares_memory(frame_object.data, decoded):
+            return None
+        return decoded
+
+    def _read_from_file(
+        self, step: int = None
+    ) -> typing.Generator[VideoFrame, None, None]:
+        if not step:
+            step = 1
         with toolbox.video_capture(self.path) as cap:
             success, frame = cap.read()
+            # frame id is counted, instead of asking cap for each frame
+            frame_id = 1
             while success:
-                yield VideoFrame.init(cap, frame)
-                success, frame = cap.read()
-
-    def _read_from_mem(self) -> typing.Generator[VideoFrame, None, None]:
-        for each_frame in self.data:
+                frame_object = VideoFrame.init(cap, frame, frame_id, self.keep_color)
+                buffer = self._get_reusable_buffer(frame_object, frame)
+                yield frame_object
+                success, frame = toolbox.video_read(cap, step, buffer=buffer)
+                frame_id += step
+
+    def _read_from_mem(
+        self, step: int = None
+    ) -> typing.Generator[VideoFrame, None, None]:
+        for each_frame in self.data[:: step or 1]:
             yield each_frame
 
-    def _read(self) -> typing.Generator[VideoFrame, None, None]:
+    def _read(self, step: int = None) -> typing.Generator[VideoFrame, None, None]:
         if self.data:
-            yield from self._read_from_mem()
+            yield from self._read_from_mem(step)
         else:
-            yield from self._read_from_file()
+            yield from self._read_from_file(step)
 
-    def get_iterator(self) -> typing.Generator[VideoFrame, None, None]:
-        return self._read()
+    def get_iterator(
+        self, step: int = None
+    ) -> typing.Generator[VideoFrame, None, None]:
+        """ read frames one by one (from frame 1), step between frames default to 1 """
+        return self._read(step)
 
     def get_operator(self) -> _BaseFrameOperator:
         if self.data:
@@ -1,6 +1,8 @@
 from stagesepx.cutter import VideoCutter, VideoCutResult
 from stagesepx.video import VideoObject
+from stagesepx import toolbox
 import os
+import pickle
 import numpy as np
 
 PROJECT_PATH = os.path.dirname(os.path.dirname(__file__))
@@ -66,6 +68,25 @@ def test_cut_range():
     stable[0].contain_image(IMAGE_PATH)
     stable[0].is_loop(0.95)
 
+    # with frames read already
+    operator = res.video.get_operator()
+    start_frame, end_frame = operator.get_frames_by_ids(
+        [stable[0].start, stable[0].end]
+    )
+    assert stable[0].is_loop(
+        0.95, start_frame=start_frame, end_frame=end_frame
+    ) == stable[0].is_loop(0.95)
+
+
+def test_pickle():
+    res = VideoCutter().cut(VIDEO_PATH)
+    res.get_range(range_threshold=0.95)
+    new = pickle.loads(pickle.dumps(res))
+    assert new.video.path == res.video.path
+    assert [(i.start, i.end) for i in new.get_range()[0]] == [
+        (i.start, i.end) for i in res.get_range()[0]
+    ]
+
 
 def test_cut_result():
     cutter = VideoCutter()
@@ -77,3 +98,62 @@ def test_cut_result():
     assert isinstance(res.thumbnail(stable[0]), np.ndarray)
     assert isinstance(res.thumbnail(stable[0], is_vertical=True), np.ndarray)
     assert isinstance(res.thumbnail(stable[0], to_dir="somewhere"), np.ndarray)
+
+
+def test_stable_mask():
+    cutter = VideoCutter()
+    res = cutter.cut(VIDEO_PATH)
+    for kwargs in ({}, {"threshold": 0.99}, {"psnr_threshold": 0.5}):
+        mask = res.get_stable_mask(**kwargs)
+        assert list(mask) == [each.is_stable(**kwargs) for each in res.range_list]
+
+
+def test_get_target_range_by_id():
+    for step in (1, 2):
+        res = VideoCutter(step=step).cut(VIDEO_PATH)
+        for frame_id in range(1, res.range_list[-1].end + 1):
+            expected = [each for each in res.range_list if each.contain(frame_id)][0]
+            assert res.get_target_range_by_id(frame_id) is expected
+
+
+def test_range_list_changed():
+    res = VideoCutter().cut(VIDEO_PATH)
+    assert res.get_unstable_range()
+    res.get_target_range_by_id(5)
+
+    # range_list is public, and can be changed in place
+    res.range_list.sort(key=lambda x: -x.start)
+    assert res.get_target_range_by_id(5).contain(5)
+    for each in res.range_list:
+        each.ssim = [1.0]
+    assert res.get_stable_mask().all()
+    assert not res.get_unstable_range()
+
+    # mean of an empty list is nan, which is not stable
+    res.range_list[0].ssim = []
+    res.range_list[-1].ssim = []
+    mask = res.get_stable_mask()
+    assert list(mask) == [each.is_stable() for each in res.range_list]
+
+
+def test_compare_block():
+    start = np.random.randint(0, 256, (60, 90, 3), dtype=np.uint8)
+    end = np.random.randint(0, 256, (60, 90, 3), dtype=np.uint8)
+    grey_start, grey_end = toolbox.turn_grey(start), toolbox.turn_grey(end)
+    assert VideoCutter.compare_block(start, end, 3) == VideoCutter.compare_block(
+        grey_start, grey_end, 3
+    )
+
+
+def test_pic_split():
+    origin = np.arange(10 * 7).reshape(10, 7)
+    expected = [
+        sub
+        for each in np.array_split(origin, 3, axis=0)
+        for sub in np.array_split(each, 3, axis=1)
+    ]
+    actual = VideoCutter.pic_split(origin, 3)
+    assert len(actual) == len(expected)
+    for a, b in zip(actual, expected):
+        assert np.array_equal(a, b)
+        assert np.shares_memory(a, origin)
@@ -1,4 +1,5 @@
 import os
+import numpy as np
 
 from stagesepx import toolbox
 
@@ -85,3 +86,38 @@ def test_match_template():
 
     ret = toolbox.match_template_with_path(IMAGE_PATH, image2)
     assert ret["ok"]
+
+
+def test_block_sum():
+    image = toolbox.turn_grey(toolbox.imread(IMAGE_PATH)).astype(float)
+    block_sum, block_size = toolbox.block_sum(image, 3)
+    for i, each_block in enumerate(np.array_split(image, 3, axis=0)):
+        for j, each in enumerate(np.array_split(each_block, 3, axis=1)):
+            assert block_sum[i, j] == each.sum()
+            assert block_size[i, j] == each.size
+
+
+def test_compare_ssim():
+    image = toolbox.imread(IMAGE_PATH)
+    assert toolbox.compare_ssim(image, image) > 0.99
+    assert toolbox.compare_ssim(image, 255 - image) < 0.5
+
+
+def test_match_template_fast_path():
+    with toolbox.video_capture(VIDEO_PATH) as cap:
+        target = toolbox.turn_grey(toolbox.get_frame(cap, 5))
+    h, w = target.shape
+    template = target[h // 4 : h // 2, w // 4 : w // 2]
+    findit_kwargs = {
+        "engine_template_cv_method_name": "cv2.TM_CCOEFF_NORMED",
+        "engine_template_scale": (1, 3, 10),
+    }
+
+    result = toolbox.match_template_with_object(template, target)
+    expected = toolbox._match_template_with_findit(template, target, **findit_kwargs)
+    assert result["target_point"] == expected["target_point"]
+    assert np.isclose(result["target_sim"], expected["target_sim"])
+
+    # other findit options are sent to findit
+    result = toolbox.match_template_with_object(template, target, pro_mode=True)
+    assert "conf" in result
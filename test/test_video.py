@@ -33,6 +33,46 @@ def test_read_from_mem():
     assert not v.data
 
 
+def test_read_with_step():
+    v = VideoObject(VIDEO_PATH)
+    from_file = [f.frame_id for f in v.get_iterator(step=2)]
+    assert from_file[:3] == [1, 3, 5]
+
+    v.load_frames()
+    from_mem = [f.frame_id for f in v.get_iterator(step=2)]
+    assert from_file == from_mem
+
+
+def test_keep_color():
+    v = VideoObject(VIDEO_PATH)
+    assert next(v.get_iterator()).data.ndim == 2
+
+    v = VideoObject(VIDEO_PATH, keep_color=True)
+    assert next(v.get_iterator()).data.ndim == 3
+    v.load_frames()
+    assert v.data[0].data.ndim == 3
+    assert v.get_operator().get_frame_by_id(1).data.ndim == 3
+
+
+def test_get_frames_by_ids():
+    v = VideoObject(VIDEO_PATH)
+    frame_id_list = [2, 5, 5, 40, 31, 3]
+    operator = v.get_operator()
+    for each_id, each_frame in zip(
+        frame_id_list, operator.get_frames_by_ids(frame_id_list)
+    ):
+        expected = operator.get_frame_by_id(each_id)
+        if expected is None:
+            assert each_frame is None
+            continue
+        assert each_frame.frame_id == expected.frame_id
+        assert (each_frame.data == expected.data).all()
+
+    v.load_frames()
+    frames = list(v.get_operator().get_frames_by_ids([2, 5]))
+    assert [i.frame_id for i in frames] == [2, 5]
+
+
 def test_convert_first():
     v = VideoObject(VIDEO_PATH, fps=30)
     v.load_frames()